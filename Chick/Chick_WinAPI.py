@@ -1,3 +1,4 @@
+import ctypes
 import pyautogui
 import time
 import threading
@@ -7,6 +8,7 @@ import psutil
 import keyboard
 import win32api
 import win32con
+from ctypes import wintypes
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -14,6 +16,41 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # 启用安全保护
 pyautogui.FAILSAFE = True
 
+# —— SendInput 批量注入 ——
+# 每次 SendInput 一次性注入一批 按下+抬起 事件，
+# 省掉逐次 mouse_event 的 Python→WinAPI 往返开销
+CLICK_BATCH = 8
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", wintypes.WPARAM),
+    ]
+
+class INPUT(ctypes.Structure):
+    class _U(ctypes.Union):
+        _fields_ = [("mi", MOUSEINPUT)]
+    _anonymous_ = ("u",)
+    _fields_ = [("type", wintypes.DWORD), ("u", _U)]
+
+INPUT_MOUSE = 0
+
+def _build_click_batch(n=CLICK_BATCH):
+    """ 预填充 n 次左键 按下+抬起 的 INPUT 数组，只分配一次 """
+    arr = (INPUT * (n * 2))()
+    for i in range(n):
+        arr[2 * i].type = INPUT_MOUSE
+        arr[2 * i].mi.dwFlags = win32con.MOUSEEVENTF_LEFTDOWN
+        arr[2 * i + 1].type = INPUT_MOUSE
+        arr[2 * i + 1].mi.dwFlags = win32con.MOUSEEVENTF_LEFTUP
+    return arr
+
+_click_inputs = _build_click_batch()
+
 class Clicker:
     def __init__(self, min_interval=0.00000000000000000000000000000001, max_interval=1.0, default_interval=0.01):
         self.clicking_event = threading.Event()
@@ -22,6 +59,7 @@ class Clicker:
         self.max_interval = max_interval
         self.active_interval = default_interval
         self.inactive_interval = 0.5  # 非活动检测间隔
+        self._stop = threading.Event()
 
     def toggle_clicking(self):
         """ 开启/暂停点击 """
@@ -55,36 +93,34 @@ class Clicker:
 
     def click_engine(self):
         """ 点击主循环 """
-        while True:
-            if self.clicking_event.is_set():
-                try:
-                    # 获取当前鼠标位置
-                    x, y = win32api.GetCursorPos()  # 获取当前鼠标坐标
-
-                    # 模拟鼠标点击
-                    win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0)  # 模拟按下
-                    time.sleep(0.1)  # 按下和抬起之间的小延迟
-                    win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0)  # 模拟抬起
-
-                    time.sleep(self.active_interval)
-                except Exception as e:
-                    logging.error(f"⚠️ 点击异常：{e}")
-                    self.clicking_event.clear()
-            else:
-                time.sleep(self.inactive_interval)
+        while not self._stop.is_set():
+            # 暂停时挂在 Event 上等待，唤醒零延迟且空转不耗 CPU
+            if not self.clicking_event.wait(timeout=self.inactive_interval):
+                continue
+            try:
+                # 一次注入一批点击（在当前鼠标位置），吞吐不再受逐次调用限制
+                sent = ctypes.windll.user32.SendInput(
+                    len(_click_inputs), _click_inputs, ctypes.sizeof(INPUT)
+                )
+                if sent != len(_click_inputs):
+                    raise ctypes.WinError()
+                time.sleep(self.active_interval * CLICK_BATCH)
+            except Exception as e:
+                logging.error(f"⚠️ 点击异常：{e}")
+                self.clicking_event.clear()
 
     def resource_monitor(self):
         """ 系统资源监控 """
-        while True:
+        while not self._stop.wait(timeout=5):
             if self.clicking_event.is_set():
                 cpu = psutil.cpu_percent()
                 mem = psutil.virtual_memory().percent
                 logging.info(f"📊 系统负载 | CPU: {cpu:.1f}% | 内存: {mem:.1f}%")
-            time.sleep(5)
 
     def graceful_exit(self):
         """ 退出程序 """
         logging.info("\n🛑 正在停止所有线程...")
+        self._stop.set()
         self.clicking_event.clear()
         time.sleep(0.2)  # 等待当前点击完成
         logging.info("✅ 资源已释放")
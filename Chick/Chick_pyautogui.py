@@ -19,6 +19,7 @@ class Clicker:
         self.max_interval = max_interval
         self.active_interval = default_interval
         self.inactive_interval = 0.5  # 非活动检测间隔
+        self._stop = threading.Event()
 
     def toggle_clicking(self):
         """ 开启/暂停点击 """
@@ -52,32 +53,32 @@ class Clicker:
 
     def click_engine(self):
         """ 点击主循环 """
-        while True:
-            if self.clicking_event.is_set():
-                try:
-                    pyautogui.click()
-                    time.sleep(self.active_interval)
-                except pyautogui.FailSafeException:
-                    logging.warning("❌ 安全保护触发！鼠标移至屏幕左上角")
-                    self.clicking_event.clear()
-                except Exception as e:
-                    logging.error(f"⚠️ 点击异常：{e}")
-                    self.clicking_event.clear()
-            else:
-                time.sleep(self.inactive_interval)
+        while not self._stop.is_set():
+            # 暂停时挂在 Event 上等待，唤醒零延迟且空转不耗 CPU
+            if not self.clicking_event.wait(timeout=self.inactive_interval):
+                continue
+            try:
+                pyautogui.click()
+                time.sleep(self.active_interval)
+            except pyautogui.FailSafeException:
+                logging.warning("❌ 安全保护触发！鼠标移至屏幕左上角")
+                self.clicking_event.clear()
+            except Exception as e:
+                logging.error(f"⚠️ 点击异常：{e}")
+                self.clicking_event.clear()
 
     def resource_monitor(self):
         """ 系统资源监控 """
-        while True:
+        while not self._stop.wait(timeout=5):
             if self.clicking_event.is_set():
                 cpu = psutil.cpu_percent()
                 mem = psutil.virtual_memory().percent
                 logging.info(f"📊 系统负载 | CPU: {cpu:.1f}% | 内存: {mem:.1f}%")
-            time.sleep(5)
 
     def graceful_exit(self):
         """ 退出程序 """
         logging.info("\n🛑 正在停止所有线程...")
+        self._stop.set()
         self.clicking_event.clear()
         time.sleep(0.2)  # 等待当前点击完成
         logging.info("✅ 资源已释放")
@@ -1,20 +1,88 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
+# 可选依赖：libvips 按扫描线流式解码，超大图裁剪只需 O(切片) 内存
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
 
-def slice_image_horizontally(image_path, output_dir, output_prefix, slices=5):
-    # 打开图片
-    img = Image.open(image_path)
-    width, height = img.size
+# 可选依赖：tifffile 对 TIFF/NDPI 直接 memmap 取条带，千兆像素图也不会整图解码
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+# tifffile 路径处理的 TIFF 家族后缀
+TIFF_EXTS = {".tif", ".tiff", ".ndpi"}
+
+
+def _slice_with_pyvips(image_path, output_dir, output_prefix, slices):
+    # sequential 模式下 libvips 只解码用到的扫描线，切片自上而下正好满足顺序访问
+    img = pyvips.Image.new_from_file(image_path, access="sequential")
+    width, height = img.width, img.height
+    slice_height = height // slices
+
+    for i in range(slices):
+        upper = i * slice_height
+        lower = (i + 1) * slice_height if i < slices - 1 else height
+        output_path = os.path.join(output_dir, f"{output_prefix}_{i+1}.png")
+        img.crop(0, upper, width, lower - upper).pngsave(output_path, compression=1)
+        print(f"保存切片 {i+1} 到 {output_path}")
 
+
+def _slice_with_tifffile(image_path, output_dir, output_prefix, slices):
+    # memmap 把解码结果映射到文件，切片只读自己那一条带的像素
+    with tifffile.TiffFile(image_path) as tf:
+        page = tf.pages[0]
+        try:
+            arr = page.asarray(out="memmap")
+        except ValueError:
+            # 压缩编码不支持 memmap 时退回普通解码
+            arr = page.asarray()
+        height = arr.shape[0]
+        slice_height = height // slices
+
+        for i in range(slices):
+            upper = i * slice_height
+            lower = (i + 1) * slice_height if i < slices - 1 else height
+            output_path = os.path.join(output_dir, f"{output_prefix}_{i+1}.png")
+            Image.fromarray(arr[upper:lower]).save(
+                output_path, format="PNG", compress_level=1, optimize=False
+            )
+            print(f"保存切片 {i+1} 到 {output_path}")
+
+
+def slice_image_horizontally(image_path, output_dir, output_prefix, slices=5):
     # 如果输出目录不存在，则创建该目录
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    # TIFF 家族优先走 tifffile 条带读取，内存只有 O(条带) 大小
+    suffix = os.path.splitext(image_path)[1].lower()
+    if tifffile is not None and suffix in TIFF_EXTS:
+        _slice_with_tifffile(image_path, output_dir, output_prefix, slices)
+        return
+
+    # 装了 pyvips 就走流式路径，内存不随整图大小增长
+    if pyvips is not None:
+        _slice_with_pyvips(image_path, output_dir, output_prefix, slices)
+        return
+
+    # 打开图片
+    img = Image.open(image_path)
+    # JPEG 输入直接按 RGB 解码，跳过多余的色彩空间转换
+    if img.format == "JPEG":
+        img.draft("RGB", img.size)
+    # 只完整解码一次，后面的 crop 都是同一份像素上的视图
+    img.load()
+    width, height = img.size
+
     # 计算每一片的高度（注意：如果图片高度不能被5整除，最后一片会包含剩余的像素）
     slice_height = height // slices
 
-    for i in range(slices):
+    def save_slice(i):
         # 定义每个切片的边界
         left = 0
         upper = i * slice_height
@@ -26,9 +94,14 @@ def slice_image_horizontally(image_path, output_dir, output_prefix, slices=5):
         cropped_img = img.crop((left, upper, right, lower))
         # 构造输出文件完整路径
         output_path = os.path.join(output_dir, f"{output_prefix}_{i+1}.png")
-        cropped_img.save(output_path)
+        # 低压缩等级编码，PNG 写出速度优先（体积略大但快数倍）
+        cropped_img.save(output_path, format="PNG", compress_level=1, optimize=False)
         print(f"保存切片 {i+1} 到 {output_path}")
 
+    # PNG 编码在 libpng 里会释放 GIL，几个切片并行写出能吃满多核
+    with ThreadPoolExecutor(max_workers=min(slices, os.cpu_count() or 1)) as pool:
+        list(pool.map(save_slice, range(slices)))
+
 
 if __name__ == "__main__":
     # 替换为你的图片路径和输出前缀
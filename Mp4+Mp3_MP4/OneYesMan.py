@@ -19,16 +19,72 @@ import argparse
 import sys
 import logging
 import atexit
-import signal
+import threading
+import time
 from pathlib import Path
 
 # 支持的媒体扩展名
 VIDEO_EXT = {".mp4", ".mov", ".mkv", ".avi", ".flv", ".webm"}
 AUDIO_EXT = {".mp3", ".aac", ".wav", ".flac", ".ogg"}
 
+# 进度停滞超过该秒数即视为 FFmpeg 卡死，提前中断而不是干等总超时
+STALL_TIMEOUT = 30
+
 # 临时文件列表，用于退出时清理（目前无临时文件）
 _temp_files = []
 
+# 输出容器能直接装下的编码（命中即流复制，省掉整个转码）
+VIDEO_COPY_COMPAT = {
+    ".mp4": {"h264", "hevc"},
+    ".mov": {"h264", "hevc"},
+    ".mkv": {"h264", "hevc", "vp9", "av1"},
+    ".webm": {"vp8", "vp9", "av1"},
+}
+AUDIO_COPY_COMPAT = {
+    ".mp4": {"aac", "mp3"},
+    ".mov": {"aac", "mp3"},
+    ".mkv": {"aac", "mp3", "flac", "opus", "vorbis"},
+    ".webm": {"opus", "vorbis"},
+}
+
+def probe_codec(path: Path, stream: str) -> str:
+    """用 ffprobe 读取首个视频/音频流的编码名，探测失败返回空串"""
+    if not shutil.which("ffprobe"):
+        return ""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", stream,
+             "-show_entries", "stream=codec_name", "-of", "csv=p=0", str(path)],
+            capture_output=True, text=True, timeout=30
+        )
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+# 硬件 H.264 编码器优先级（有 GPU/VPU 就不用 CPU 慢慢转）
+HW_ENCODER_PRIORITY = ["h264_nvenc", "h264_qsv", "h264_videotoolbox"]
+_video_encoder = None
+
+def detect_video_encoder() -> str:
+    """
+    探测本机 ffmpeg 可用的硬件 H.264 编码器，没有则退回 libx264。
+    只探测一次并缓存结果。
+    """
+    global _video_encoder
+    if _video_encoder is None:
+        try:
+            out = subprocess.check_output(
+                ["ffmpeg", "-hide_banner", "-encoders"],
+                stderr=subprocess.DEVNULL, text=True
+            )
+        except Exception:
+            out = ""
+        _video_encoder = next(
+            (enc for enc in HW_ENCODER_PRIORITY if enc in out), "libx264"
+        )
+        logging.debug(f"选用视频编码器: {_video_encoder}")
+    return _video_encoder
+
 def setup_logging(verbose: bool):
     """
     配置日志输出到标准输出，避免干扰 input() 提示。
@@ -41,6 +97,7 @@ def check_ffmpeg():
     if not shutil.which("ffmpeg"):
         logging.error("未检测到 ffmpeg，请先安装并配置到 PATH。")
         sys.exit(1)
+    detect_video_encoder()
 
 def validate_media_file(path: Path, allowed_exts: set, role: str):
     if not path.is_file():
@@ -85,23 +142,35 @@ def merge_av(input_video: Path, input_audio: Path, output_video: Path,
     out_dir.mkdir(parents=True, exist_ok=True)
     ensure_disk_space(out_dir)
 
-    # 根据输出后缀选择视频编码器
+    # 先探测输入编码，容器兼容就流复制——合并退化成 remux，快几十倍
     suffix = output_video.suffix.lower()
-    if suffix == ".mp4":
+    if suffix == ".mp4" or probe_codec(input_video, "v:0") in VIDEO_COPY_COMPAT.get(suffix, ()):
         video_codec = "copy"  # 原画
     else:
-        video_codec = "libx264"  # 近无损编码
-    audio_codec = "aac"
+        video_codec = detect_video_encoder()  # 硬件优先，退回 libx264
+    if probe_codec(input_audio, "a:0") in AUDIO_COPY_COMPAT.get(suffix, ()):
+        audio_codec = "copy"
+    else:
+        audio_codec = "aac"
 
-    # 如果是重新编码模式，加 CRF 与 preset
+    # 如果是重新编码模式，按编码器加对应参数
     extra_v = []
-    if video_codec != "copy":
+    if video_codec == "libx264":
         extra_v = ["-crf", "18", "-preset", "slow"]
+    elif video_codec == "h264_nvenc":
+        extra_v = ["-preset", "p4", "-tune", "ll"]
+
+    # 重新编码时让解码也走硬件
+    hw_flags = [] if video_codec == "copy" else ["-hwaccel", "auto"]
 
     # 构造 FFmpeg 命令
+    # -progress pipe:2 把 out_time_ms= 进度行打到 stderr；-timelimit 再加一道 CPU 时间保险
     ff_cmd = [
         "ffmpeg",
         "-y" if overwrite else "-n",
+        "-nostats", "-progress", "pipe:2",
+        "-timelimit", str(timeout),
+        *hw_flags,
         "-i", str(input_video.resolve()),
         "-i", str(input_audio.resolve()),
         "-c:v", video_codec, *extra_v,
@@ -114,14 +183,42 @@ def merge_av(input_video: Path, input_audio: Path, output_video: Path,
 
     proc = subprocess.Popen(
         ff_cmd,
-        stdout=None if verbose else subprocess.DEVNULL,
-        stderr=None if verbose else subprocess.DEVNULL
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True, errors="replace"
     )
-    try:
-        proc.wait(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        proc.send_signal(signal.SIGINT)
-        raise TimeoutError("FFmpeg 合并超时已中断")
+    last_progress = time.monotonic()
+
+    def _drain_stderr():
+        # 后台线程持续读 stderr，看到进度行就刷新时间戳，避免管道写满把 FFmpeg 卡住
+        nonlocal last_progress
+        for line in proc.stderr:
+            if line.startswith(("out_time", "progress=")):
+                last_progress = time.monotonic()
+            elif verbose:
+                logging.debug(line.rstrip())
+
+    threading.Thread(target=_drain_stderr, daemon=True).start()
+
+    def _kill(reason: str):
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        raise TimeoutError(reason)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            proc.wait(timeout=1)
+            break
+        except subprocess.TimeoutExpired:
+            now = time.monotonic()
+            if now - last_progress > STALL_TIMEOUT:
+                _kill(f"FFmpeg 进度停滞超过 {STALL_TIMEOUT}s，已中断")
+            if now > deadline:
+                _kill("FFmpeg 合并超时已中断")
     if proc.returncode != 0:
         raise subprocess.CalledProcessError(proc.returncode, ff_cmd)
     logging.info(f"合并成功 👉 {output_video}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Linux statx(2) 的最小 ctypes 封装。
+
+gather() 只关心 类型/inode/大小/mtime 这几个字段，statx 可以带上
+AT_STATX_DONT_SYNC——在 NFS/FUSE 挂载上不强制回源刷新属性，
+也不用把整个 struct stat 从内核搬出来。非 Linux、旧内核或
+不认识的架构自动退回 os.stat。
+"""
+
+import ctypes
+import os
+import sys
+from collections import namedtuple
+from errno import ENOSYS
+
+AT_FDCWD            = -100
+AT_SYMLINK_NOFOLLOW = 0x100
+AT_STATX_DONT_SYNC  = 0x4000
+STATX_TYPE  = 0x001
+STATX_INO   = 0x100
+STATX_SIZE  = 0x200
+STATX_MTIME = 0x040
+
+_WANT  = STATX_TYPE | STATX_INO | STATX_SIZE | STATX_MTIME
+_FLAGS = AT_STATX_DONT_SYNC | AT_SYMLINK_NOFOLLOW
+
+# statx 的系统调用号因架构而异
+_SYS_STATX = {"x86_64": 332, "aarch64": 291, "riscv64": 291}
+
+StatResult = namedtuple(
+    "StatResult", "st_mode st_ino st_size st_mtime st_mtime_ns")
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("__reserved", ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    # 只声明到 stx_mtime 为止用到的字段，剩余部分并入尾部填充，
+    # 总大小保持内核定义的 256 字节
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("__spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", _StatxTimestamp),
+        ("stx_btime", _StatxTimestamp),
+        ("stx_ctime", _StatxTimestamp),
+        ("stx_mtime", _StatxTimestamp),
+        ("__spare1", ctypes.c_uint64 * 16),
+    ]
+
+
+# 函数指针与调用号都缓存在模块级，不在每个文件上重复查找
+_syscall = None
+_statx_nr = None
+if sys.platform == "linux":
+    _statx_nr = _SYS_STATX.get(os.uname().machine)
+    if _statx_nr is not None:
+        try:
+            _syscall = ctypes.CDLL("libc.so.6", use_errno=True).syscall
+        except OSError:
+            _syscall = None
+
+
+def _fallback_stat(path) -> StatResult:
+    st = os.stat(path, follow_symlinks=False)
+    return StatResult(
+        st.st_mode, st.st_ino, st.st_size, st.st_mtime, st.st_mtime_ns)
+
+
+def fast_stat(path) -> StatResult:
+    """返回 (mode, ino, size, mtime, mtime_ns)，不跟随符号链接。"""
+    global _syscall
+    if _syscall is None:
+        return _fallback_stat(path)
+    buf = _Statx()
+    rc = _syscall(_statx_nr, AT_FDCWD, os.fsencode(path),
+                  _FLAGS, _WANT, ctypes.byref(buf))
+    if rc != 0:
+        err = ctypes.get_errno()
+        if err == ENOSYS:
+            # 旧内核没有 statx，之后全部走 os.stat
+            _syscall = None
+            return _fallback_stat(path)
+        raise OSError(err, os.strerror(err), os.fsdecode(path))
+    mtime_ns = buf.stx_mtime.tv_sec * 1_000_000_000 + buf.stx_mtime.tv_nsec
+    return StatResult(
+        buf.stx_mode, buf.stx_ino, buf.stx_size, mtime_ns / 1e9, mtime_ns)
@@ -1,32 +1,49 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import errno
 import fnmatch
 import hashlib
 import json
 import logging
 import os
-import platform
+import queue
 import random
+import re
 import shutil
 import signal
+import stat
 import sys
 import tempfile
 import threading
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from multiprocessing import Process
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fast_stat import fast_stat
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 from watchdog.observers.polling import PollingObserver
 
+# 可选依赖：Linux 上直接读 inotify，省掉 watchdog 的事件翻译层，
+# 还能用 move cookie 把改名配成一对
+try:
+    from inotify_simple import INotify, flags as in_flags
+except ImportError:
+    INotify = None
+
 # —— 猫娘尾巴 ——
 CAT_TAILS = ["喵～", "喵♡～", "呜喵～", "噜～"]
 def random_tail() -> str:
     return random.choice(CAT_TAILS)
 
+# Windows 没有 fcntl，此时跳过 FICLONE 快路径
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # —— 8. 资源限制 ——
 try:
     import resource
@@ -37,8 +54,14 @@ except Exception:
 
 CFG_PATH = Path("config.json")
 DEBOUNCE = 1.0
+# 事件驱动的增量同步之外，隔这么久做一次整树对账，兜住丢失的事件
+FULL_SCAN_INTERVAL = 3600.0
+# 置 SYNC_QUIET=1 把逐文件日志降为 DEBUG，大批量同步时跳过海量字符串构造
+FILE_LOG_LEVEL = logging.DEBUG if os.environ.get("SYNC_QUIET") else logging.INFO
 HEARTBEAT_INTERVAL = 3600
 RESTART_DELAY = 5
+# 休眠源的看门人多久 stat 一次根目录
+DORMANT_POLL = 60.0
 
 # —— 猫娘日志格式 + 轮转 ——
 class CatFormatter(logging.Formatter):
@@ -46,6 +69,11 @@ class CatFormatter(logging.Formatter):
         ct = self.formatTime(record, "%Y-%m-%d %H:%M:%S")
         return f"{ct} | {record.levelname:^5} | {record.getMessage()} {random_tail()}"
 
+# 后台日志 listener，退出时统一 stop 冲刷队列
+_log_listeners: list[QueueListener] = []
+# sync_worker 子进程里置 True：任务日志只落盘，终端留给父进程的根日志
+_worker_process = False
+
 def setup_logger(name: str, logfile: Path) -> logging.Logger:
     logfile.parent.mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger(name)
@@ -54,15 +82,33 @@ def setup_logger(name: str, logfile: Path) -> logging.Logger:
     if not logger.handlers:
         fmt = CatFormatter()
         fh = RotatingFileHandler(
-            logfile, maxBytes=10*1024*1024, backupCount=5, encoding="utf-8"
+            logfile, maxBytes=10*1024*1024, backupCount=5,
+            encoding="utf-8", delay=True
         )
         fh.setFormatter(fmt)
-        sh = logging.StreamHandler()
-        sh.setFormatter(fmt)
-        logger.addHandler(fh)
-        logger.addHandler(sh)
+        handlers = [fh]
+        if not _worker_process:
+            sh = logging.StreamHandler()
+            sh.setFormatter(fmt)
+            handlers.append(sh)
+        # 热路径只把记录入队，格式化和写盘由 listener 线程异步完成
+        q = queue.SimpleQueue()
+        listener = QueueListener(q, *handlers, respect_handler_level=True)
+        listener.start()
+        _log_listeners.append(listener)
+        # 挂在 logger 上，任务 stop 时能找到自己的 listener 单独停掉
+        logger._cat_listener = listener
+        logger.addHandler(QueueHandler(q))
     return logger
 
+def stop_log_listeners():
+    for listener in _log_listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+    _log_listeners.clear()
+
 def retry(times=3, delay=0.5):
     def deco(fn):
         def wrapper(*a, **kw):
@@ -77,12 +123,98 @@ def retry(times=3, delay=0.5):
         return wrapper
     return deco
 
-def compute_hash(path: Path, algo="sha256", chunk_size=8192) -> str:
-    h = hashlib.new(algo)
+_HAS_FILE_DIGEST = hasattr(hashlib, "file_digest")
+
+def compute_hash(path: Path, algo="sha256", chunk_size=1 << 20) -> str:
     with path.open("rb") as f:
+        # 3.11+ 的 file_digest 在一次 C 调用里完成读+更新并释放 GIL
+        if _HAS_FILE_DIGEST:
+            return hashlib.file_digest(f, algo).hexdigest()
+        h = hashlib.new(algo)
         for chunk in iter(lambda: f.read(chunk_size), b""):
             h.update(chunk)
-    return h.hexdigest()
+        return h.hexdigest()
+
+# FICLONE ioctl：btrfs/XFS 等支持 reflink 的文件系统上 O(1) 写时复制克隆
+FICLONE = 0x40049409
+# 低于该大小的文件一次 read/write 即可，不值得走内核拷贝路径
+SMALL_FILE_CUTOFF = 64 * 1024
+
+# 收不到内核事件、只能整树轮询的网络文件系统
+NETWORK_FSTYPES = {"nfs", "nfs4", "cifs", "smbfs", "fuse.sshfs"}
+
+def _on_network_fs(path) -> bool:
+    """查 /proc/mounts 判断路径是否落在网络挂载上（非 Linux 返回 False）。"""
+    try:
+        p = os.path.realpath(path)
+        best_mnt, best_type = "", ""
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt, fstype = parts[1], parts[2]
+                if ((p == mnt or p.startswith(mnt.rstrip("/") + "/"))
+                        and len(mnt) > len(best_mnt)):
+                    best_mnt, best_type = mnt, fstype
+        return best_type in NETWORK_FSTYPES
+    except OSError:
+        return False
+
+# 可用性在导入时判定一次，热路径里不再每次 hasattr
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+_HAS_SENDFILE = hasattr(os, "sendfile")
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> bool:
+    """尽量让数据留在内核态：copy_file_range 优先，其次 sendfile。
+
+    copy_file_range 在 btrfs/XFS 上直接成为 reflink，在 NFS 上是
+    服务端拷贝；第一次调用就失败（EXDEV/ENOTSUP 等）返回 False
+    交给上层回退；拷到一半才失败则抛出，避免悄悄留下半截文件。
+    """
+    if _HAS_COPY_FILE_RANGE:
+        sent = 0
+        try:
+            while sent < size:
+                n = os.copy_file_range(src_fd, dst_fd, size - sent)
+                if n == 0:
+                    break
+                sent += n
+            return True
+        except OSError:
+            if sent:
+                raise
+    if _HAS_SENDFILE:
+        offset = 0
+        try:
+            while offset < size:
+                n = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                if n == 0:
+                    break
+                offset += n
+            return True
+        except OSError:
+            if offset:
+                raise
+    return False
+
+# 所有任务共享同一个线程池：配 10 个任务不再各养一窝线程，
+# 单任务忙碌时也能吃满整个池的 IO 并发
+GLOBAL_WORKERS = min(32, (os.cpu_count() or 4) * 2)
+_global_pool = None
+
+def get_global_pool() -> ThreadPoolExecutor:
+    global _global_pool
+    if _global_pool is None:
+        _global_pool = ThreadPoolExecutor(
+            max_workers=GLOBAL_WORKERS, thread_name_prefix="sync")
+    return _global_pool
+
+def shutdown_global_pool():
+    global _global_pool
+    if _global_pool is not None:
+        _global_pool.shutdown(wait=True)
+        _global_pool = None
 
 class SyncTask:
     def __init__(self, cfg: dict):
@@ -92,21 +224,75 @@ class SyncTask:
         self.sources = [Path(p) for p in srcs if p]
         self.targets = [Path(p) for p in tgts if p]
         self.exclude = cfg.get("exclude", [])
+        # 排除模式一次性编译成单个正则，匹配时不再逐条 fnmatch
+        self._exclude_re = re.compile(
+            "|".join(fnmatch.translate(p) for p in self.exclude)
+        ) if self.exclude else None
         self.workers = cfg.get("workers", 4)
+        # 网络挂载等收不到内核事件的场景才开轮询
+        self.force_polling = bool(cfg.get("force_polling", False))
+        # 轮询一次就是整树 stat，网络挂载上尤其贵，默认间隔放宽到 30s；
+        # 可用 poll_interval 覆盖
+        default_poll = 30.0 if any(
+            _on_network_fs(s) for s in self.sources) else 5.0
+        self.poll_interval = float(cfg.get("poll_interval", default_poll))
         self.logfile = Path(cfg.get("log", f"logs/{self.name}.log"))
 
-        # 同步控制
-        self._lock            = threading.Lock()
-        self._timer           = None
+        # 同步控制；_running 只是个原子标志位，
+        # 全量同步幂等，极小的竞争窗口漏掉也会被下次去抖补上
+        self._running         = threading.Event()
         self._pending         = False
         self._paths_lock      = threading.Lock()
-        self._pending_paths   = set()
+        self._pending_events  = []
+        self._last_full_sync  = 0.0
         self._counter_lock    = threading.Lock()
         self._copy_count      = 0
         self._delete_count    = 0
 
+        # 常驻去抖线程：事件只推后 deadline 并唤醒它，
+        # 事件风暴下不再每条都创建+取消一个 threading.Timer 线程；
+        # _stopped 由 stop() 置位，配置重载不会留下僵尸线程
+        self._stopped  = threading.Event()
+        self._wake     = threading.Event()
+        self._deadline = 0.0
+        self._debounce_thread = threading.Thread(
+            target=self._debounce_loop, daemon=True,
+            name=f"{self.name}-debounce")
+        self._debounce_thread.start()
+
+        # 每个 worker 线程复用同一块大缓冲，小文件风暴下不再反复分配
+        self._buf_local = threading.local()
+
+        # 哈希缓存：path|size|mtime_ns|ino -> 摘要，未变动的文件不再重读；
+        # _dirty 控制只在有增删时落盘，_seen 记录本轮全量引用过的键，
+        # 全量结束后据此淘汰改名/删除/重写留下的旧键
+        self._hash_cache: dict[str, str] = {}
+        self._hash_cache_dirty = False
+        self._seen_hash_keys: set[str] = set()
+        self._hash_cache_path = self.logfile.with_suffix(".hashcache.json")
+        # 源根目录 mtime 快照，重启时判断任务是否还在休眠
+        self._snapshot_path = self.logfile.with_suffix(".snapshot.json")
+
         self.logger = setup_logger(self.name, self.logfile)
+        self._load_hash_cache()
         self._validate()
+        # 源/目标配对固定不变，算一次缓存起来
+        self._pair_list = self._pairs()
+        # 热路径用的字符串版配对：(含分隔符的源前缀, 目标串, 前缀长度)；
+        # 相对路径一律用 C 级切片得出，不再过 os.path.relpath
+        self._pairs_list = tuple(
+            (os.fspath(s) + os.sep, os.fspath(t), len(os.fspath(s)) + 1)
+            for s, t in self._pair_list)
+        # 同设备检测只在启动时做一次；配合 allow_hardlinks 可把
+        # 同盘"复制"变成 O(1) 的硬链接。注意硬链接共享存储，
+        # 之后改目标文件等于改源文件，所以默认关闭
+        self.allow_hardlinks = bool(cfg.get("allow_hardlinks", False))
+        try:
+            self._same_dev = all(
+                os.stat(s).st_dev == os.stat(t).st_dev
+                for s, t in self._pair_list)
+        except OSError:
+            self._same_dev = False
         self.logger.info(f"🟢 启动任务「{self.name}」")
 
     def _validate(self):
@@ -130,20 +316,193 @@ class SyncTask:
             return [(self.sources[0], t) for t in self.targets]
         return [(s, self.targets[0]) for s in self.sources]
 
-    def should_exclude(self, path: Path, base: Path) -> bool:
-        rel = path.relative_to(base).as_posix()
-        return any(fnmatch.fnmatch(rel, pat) for pat in self.exclude)
+    def _load_hash_cache(self):
+        try:
+            self._hash_cache = json.loads(
+                self._hash_cache_path.read_text(encoding="utf-8"))
+        except Exception:
+            self._hash_cache = {}
+
+    def _save_hash_cache(self):
+        # 没有增删就不重写，去抖的增量同步不再每轮全量序列化
+        if not self._hash_cache_dirty:
+            return
+        try:
+            self._hash_cache_path.write_text(
+                json.dumps(self._hash_cache), encoding="utf-8")
+            self._hash_cache_dirty = False
+        except Exception:
+            pass
+
+    @staticmethod
+    def _hash_key(path: Path, st) -> str:
+        return f"{path}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}"
+
+    def _cached_hash(self, path: Path, st) -> str:
+        key = self._hash_key(path, st)
+        digest = self._hash_cache.get(key)
+        if digest is None:
+            digest = compute_hash(path)
+            self._hash_cache[key] = digest
+            self._hash_cache_dirty = True
+        return digest
+
+    def should_exclude(self, rel: str) -> bool:
+        return self._exclude_re is not None and bool(self._exclude_re.match(rel))
+
+    def _walk(self, base: Path):
+        """os.scandir 递归遍历，产出 (posix 相对路径, DirEntry)。
+
+        DirEntry 自带 readdir 缓存的类型与 stat 信息，
+        整棵树扫下来不再为每个文件多付 3-4 次 stat。
+        排除规则在这里按目录整批过滤：一次列表推导直接喂
+        合并正则的 C 级 match，不再为每个条目穿过
+        should_exclude 的 Python 包装层；命中的目录整棵剪枝。
+        显式栈迭代下探，深树不再为每层嵌套生成器付 yield from 转发。
+        """
+        prefix = len(os.fspath(base)) + 1
+        match = self._exclude_re.match if self._exclude_re else None
+        stack = [os.fspath(base)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            try:
+                entries = list(os.scandir(pop()))
+            except OSError:
+                continue
+            pairs = [(e.path[prefix:].replace(os.sep, "/"), e)
+                     for e in entries]
+            if match is not None:
+                pairs = [(rel, e) for rel, e in pairs if match(rel) is None]
+            for rel, e in pairs:
+                yield rel, e
+                if e.is_dir(follow_symlinks=False):
+                    push(e.path)
+
+    def _resolve_hash_pairs(self, hash_pairs, to_copy):
+        """对 size 相同但 mtime 更新的文件做哈希裁决。
+
+        缓存未命中的统一丢进进程池并行摘要，每个 worker 独立驱动
+        SHA 指令，不再被 GIL 串行化。
+        """
+        todo, keys, seen = [], [], set()
+        seen_keys = self._seen_hash_keys
+        for src, src_st, dst, dst_st in hash_pairs:
+            for p, st in ((src, src_st), (dst, dst_st)):
+                k = self._hash_key(p, st)
+                seen_keys.add(k)
+                if k not in self._hash_cache and k not in seen:
+                    seen.add(k)
+                    todo.append(p)
+                    keys.append(k)
+        if len(todo) > 1:
+            try:
+                with ProcessPoolExecutor() as px:
+                    for k, digest in zip(
+                        keys, px.map(compute_hash, todo, chunksize=64)
+                    ):
+                        self._hash_cache[k] = digest
+                        self._hash_cache_dirty = True
+            except Exception as e:
+                self.logger.warning(f"进程池哈希失败，回退单进程：{e}")
+        for src, src_st, dst, dst_st in hash_pairs:
+            # 上面已预热缓存，这里通常不再碰文件；单个文件在扫描后
+            # 消失（编辑器临时文件等）只跳过这一条，不拖垮整轮同步
+            try:
+                src_digest = self._cached_hash(src, src_st)
+            except OSError:
+                continue
+            try:
+                if src_digest != self._cached_hash(dst, dst_st):
+                    to_copy.append((src, dst, src_st))
+            except OSError:
+                # 目标读不到按缺失处理，直接重拷
+                to_copy.append((src, dst, src_st))
+
+    def gather(self):
+        """单遍扫描源和目标各一次，用 dict 差集算出 (待复制, 待删除)。"""
+        to_copy: list[tuple[Path, Path]] = []
+        to_delete: list[Path] = []
+        hash_pairs: list[tuple] = []
+        # 内层循环按百万级文件跑，把属性查找提升成局部名
+        walk = self._walk
+        copy_append = to_copy.append
+        delete_append = to_delete.append
+        hash_append = hash_pairs.append
+        for s_prefix, t_str, _ in self._pairs_list:
+            # _walk 已按目录整批过滤掉排除项
+            src_map = dict(walk(s_prefix[:-1]))
+            dst_map = dict(walk(t_str))
+            dst_get = dst_map.get
+
+            for rel, s_entry in src_map.items():
+                try:
+                    if not s_entry.is_file():
+                        continue
+                    d_entry = dst_get(rel)
+                    need = False
+                    src_st = None
+                    if d_entry is None:
+                        need = True
+                    else:
+                        # DirEntry.stat 的结果缓存在条目里：类型判断、
+                        # 这里的比较、后面复制时的 mtime 回写共用同一次
+                        # lstat，同一条目不再重复下 stat
+                        src_st = s_entry.stat(follow_symlinks=False)
+                        try:
+                            dst_st = d_entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            # 扫描后被删了，按缺失处理直接重拷
+                            dst_st = None
+                        # 大小+纳秒 mtime 全等直接跳过；否则哈希做最终裁决
+                        if dst_st is None or src_st.st_size != dst_st.st_size:
+                            need = True
+                        elif src_st.st_mtime_ns != dst_st.st_mtime_ns:
+                            # 攒起来统一交给进程池做摘要
+                            hash_append((Path(s_entry.path), src_st,
+                                         Path(f"{t_str}/{rel}"), dst_st))
+                            continue
+                    if need:
+                        # 目标 Path 只在真要动文件时才构造，
+                        # 稳态下未变动的大多数文件一个对象都不分配
+                        copy_append((Path(s_entry.path),
+                                     Path(f"{t_str}/{rel}"), src_st))
+                except OSError:
+                    continue
+
+            # 孤儿检查用 dict keys 的 C 级差集一次算完，
+            # 不再逐条目在 Python 层做 in 判断
+            for rel in dst_map.keys() - src_map.keys():
+                delete_append(Path(dst_map[rel].path))
+
+        if hash_pairs:
+            self._resolve_hash_pairs(hash_pairs, to_copy)
+
+        # 先删深层文件再删目录，rmdir 才不会撞上非空目录
+        to_delete.sort(key=lambda p: len(p.parts), reverse=True)
+        return to_copy, to_delete
 
     def cleanup_tmp_files(self):
-        for _, t_base in self._pairs():
-            for tmp in t_base.rglob("*.sync_tmp*"):
+        # 迭代式 scandir 扫残留临时文件：rglob 会为每个条目造一个
+        # Path 对象，这里全程只用 str，命中的才动手
+        for _, t_base in self._pair_list:
+            stack = [os.fspath(t_base)]
+            while stack:
                 try:
-                    tmp.unlink()
-                    self.logger.info(f"🧹 清理临时文件：{tmp}")
-                except: pass
+                    entries = list(os.scandir(stack.pop()))
+                except OSError:
+                    continue
+                for e in entries:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif ".sync_tmp" in e.name:
+                        try:
+                            os.unlink(e.path)
+                            self.logger.info(f"🧹 清理临时文件：{e.path}")
+                        except OSError:
+                            pass
 
     @retry(times=3, delay=0.3)
-    def _atomic_copy(self, src: Path, dst: Path):
+    def _atomic_copy(self, src: Path, dst: Path, src_st=None):
         if src.is_symlink():
             target = os.readlink(src)
             try: dst.unlink()
@@ -153,17 +512,72 @@ class SyncTask:
             except: pass
             return
         dst.parent.mkdir(parents=True, exist_ok=True)
-        tmp = tempfile.NamedTemporaryFile(dir=dst.parent, delete=False)
+        if self.allow_hardlinks and self._same_dev:
+            # 同设备硬链接：纯元数据操作，1GB 的"复制"也只要几毫秒；
+            # 先链到临时名再 replace，对读者保持原子
+            tmp = os.fspath(dst) + f".sync_tmp{os.getpid()}"
+            try:
+                os.link(src, tmp)
+                os.replace(tmp, dst)
+                return
+            except OSError:
+                # 跨挂载点/文件系统不支持等情况，回退常规拷贝
+                try: os.unlink(tmp)
+                except OSError: pass
+        # mkstemp 直接给裸 fd，没有 NamedTemporaryFile 的包装层和登记开销
+        src_fd = os.open(src, os.O_RDONLY)
+        tmp_fd = -1
+        tmp_path = None
         try:
-            with src.open("rb") as fsrc, tmp:
-                shutil.copyfileobj(fsrc, tmp); tmp.flush()
-            Path(tmp.name).replace(dst)
-            try: shutil.copystat(src, dst, follow_symlinks=False)
-            except: pass
-        finally:
-            if tmp and Path(tmp.name).exists():
-                try: Path(tmp.name).unlink()
+            size = os.fstat(src_fd).st_size
+            tmp_fd, tmp_path = tempfile.mkstemp(
+                dir=dst.parent, suffix=".sync_tmp")
+            copied = False
+            if fcntl is not None:
+                try:
+                    # 同文件系统先试 reflink 克隆，命中则完全不搬数据
+                    fcntl.ioctl(tmp_fd, FICLONE, src_fd)
+                    copied = True
+                except OSError:
+                    pass
+            if not copied and size <= SMALL_FILE_CUTOFF:
+                # 小文件一次读写搞定，省掉内核拷贝路径的准备成本
+                os.write(tmp_fd, os.read(src_fd, size))
+                copied = True
+            if not copied and not _kernel_copy(src_fd, tmp_fd, size):
+                # 兜底：线程本地缓冲的用户态读写循环
+                buf = getattr(self._buf_local, "buf", None)
+                if buf is None:
+                    buf = self._buf_local.buf = bytearray(1 << 20)
+                view = memoryview(buf)
+                while True:
+                    n = os.readv(src_fd, [buf])
+                    if not n:
+                        break
+                    os.write(tmp_fd, view[:n])
+            os.close(tmp_fd)
+            tmp_fd = -1
+            os.replace(tmp_path, dst)
+            tmp_path = None
+            if src_st is not None:
+                # 纳秒精度回写 mtime，下一轮扫描两边严格相等直接跳过；
+                # 复用 gather 拿到的 stat，源文件不用再 stat 一次
+                try: os.utime(dst, ns=(src_st.st_mtime_ns, src_st.st_mtime_ns))
+                except OSError: pass
+            else:
+                try: shutil.copystat(src, dst, follow_symlinks=False)
                 except: pass
+        finally:
+            if tmp_fd != -1:
+                try: os.close(tmp_fd)
+                except OSError: pass
+            try:
+                os.close(src_fd)
+            except OSError:
+                pass
+            if tmp_path:
+                try: os.unlink(tmp_path)
+                except OSError: pass
 
     @retry(times=3, delay=0.3)
     def _safe_delete(self, path: Path):
@@ -172,36 +586,171 @@ class SyncTask:
         else:
             path.unlink()
 
-    def _wrapped_copy(self, src, dst, sem):
-        try:
-            self._atomic_copy(src, dst)
-            with self._counter_lock:
-                self._copy_count += 1
-            self.logger.info(f"📄 复制: {src} → {dst}")
-        finally:
-            sem.release()
+    def _copy_chunk(self, items):
+        log = self.logger
+        atomic_copy = self._atomic_copy
+        # 级别没开就完全不构造消息，%s 参数延迟到 handler 里才格式化
+        verbose = log.isEnabledFor(FILE_LOG_LEVEL)
+        for src, dst, src_st in items:
+            try:
+                atomic_copy(src, dst, src_st)
+                with self._counter_lock:
+                    self._copy_count += 1
+                if verbose:
+                    log.log(FILE_LOG_LEVEL, "📄 复制: %s → %s", src, dst)
+            except Exception as e:
+                log.error("复制失败 %s: %s", src, e)
 
-    def _wrapped_delete(self, path, sem):
-        try:
-            self._safe_delete(path)
-            with self._counter_lock:
-                self._delete_count += 1
-            self.logger.info(f"🗑 删除: {path}")
-        finally:
-            sem.release()
+    def _delete_chunk(self, items):
+        log = self.logger
+        verbose = log.isEnabledFor(FILE_LOG_LEVEL)
+        for path in items:
+            try:
+                self._safe_delete(path)
+                with self._counter_lock:
+                    self._delete_count += 1
+                if verbose:
+                    log.log(FILE_LOG_LEVEL, "🗑 删除: %s", path)
+            except Exception as e:
+                log.error("删除失败 %s: %s", path, e)
+                if getattr(e, "errno", None) == errno.ENOTEMPTY:
+                    # 目录里还有没排进本轮的内容，镜像已经不同步了：
+                    # 清掉全量时间戳，下一次去抖直接整树对账补救
+                    self._last_full_sync = 0.0
+
+    def _apply(self, to_copy, to_delete):
+        """把差异列表切块丢进全局共享线程池执行。"""
+        # 按 workers 预先切块，一个 Future 干一串活——既省掉
+        # 每文件一次的 Future 开销，也天然把本任务同时占用的
+        # 池位压在 workers 个以内，不会饿死其他任务
+        pool = get_global_pool()
+        if to_copy:
+            list(pool.map(
+                self._copy_chunk,
+                [to_copy[i::self.workers] for i in range(self.workers)]
+            ))
+        del_files = [p for p in to_delete if not p.is_dir()]
+        del_dirs  = [p for p in to_delete if p.is_dir()]
+        if del_files:
+            list(pool.map(
+                self._delete_chunk,
+                [del_files[i::self.workers] for i in range(self.workers)]
+            ))
+        # 目录保持深→浅串行删除，rmdir 不会撞上还没删完的子项
+        self._delete_chunk(del_dirs)
+
+    def full_sync(self):
+        """整树对账：全量扫描差异并执行。"""
+        self._seen_hash_keys = set()
+        to_copy, to_delete = self.gather()
+        # 全量扫描把所有还用得上的键都引用了一遍，
+        # 没被引用的就是改名/删除/重写留下的死键，这里淘汰掉，
+        # 缓存不随运行时长无限膨胀
+        if self._hash_cache:
+            kept = {k: v for k, v in self._hash_cache.items()
+                    if k in self._seen_hash_keys}
+            if len(kept) != len(self._hash_cache):
+                self._hash_cache = kept
+                self._hash_cache_dirty = True
+        self._apply(to_copy, to_delete)
+        self._last_full_sync = time.time()
+
+    def _mirror_move(self, old_path: str, new_path: str) -> bool:
+        """源端改名在目标端直接 os.replace，改名大文件不再重传字节。
+
+        任何一步失败都返回 False，交给常规的 stat 重放兜底（幂等）。
+        """
+        done = False
+        for s_prefix, t_str, s_pref in self._pairs_list:
+            if not (old_path.startswith(s_prefix)
+                    and new_path.startswith(s_prefix)):
+                continue
+            rel_old = old_path[s_pref:].replace(os.sep, "/")
+            rel_new = new_path[s_pref:].replace(os.sep, "/")
+            if self.should_exclude(rel_new):
+                continue
+            dst_old = Path(f"{t_str}/{rel_old}")
+            dst_new = Path(f"{t_str}/{rel_new}")
+            try:
+                if dst_old.exists() or dst_old.is_symlink():
+                    dst_new.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(dst_old, dst_new)
+                    self.logger.log(
+                        FILE_LOG_LEVEL, "📦 重命名: %s → %s", dst_old, dst_new)
+                    done = True
+            except OSError:
+                return False
+        return done
+
+    def _sync_events(self, events):
+        """只重新核对事件涉及的路径，代价是 O(变动数) 而非 O(整树)。"""
+        to_copy, to_delete, seen = [], [], set()
+        for evtype, src_path, dest_path in events:
+            # 改名事件先试零拷贝重命名，成功就不用再 stat/复制
+            if evtype == "moved" and src_path and dest_path:
+                if self._mirror_move(src_path, dest_path):
+                    continue
+            for p in (src_path, dest_path):
+                if not p or p in seen:
+                    continue
+                seen.add(p)
+                for s_prefix, t_str, s_pref in self._pairs_list:
+                    if not p.startswith(s_prefix):
+                        continue
+                    rel = p[s_pref:].replace(os.sep, "/")
+                    if self.should_exclude(rel):
+                        continue
+                    dst = Path(f"{t_str}/{rel}")
+                    try:
+                        src_st = fast_stat(p)
+                    except (FileNotFoundError, NotADirectoryError):
+                        # 源没了 → 镜像删除；整目录移走时事件里只有
+                        # 目录本身，得把目标侧子树全排进来，
+                        # 否则 rmdir 撞上 ENOTEMPTY
+                        if dst.is_dir() and not dst.is_symlink():
+                            stack = [os.fspath(dst)]
+                            while stack:
+                                try:
+                                    entries = list(os.scandir(stack.pop()))
+                                except OSError:
+                                    continue
+                                for e in entries:
+                                    if e.is_dir(follow_symlinks=False):
+                                        stack.append(e.path)
+                                    to_delete.append(Path(e.path))
+                            to_delete.append(dst)
+                        elif dst.exists() or dst.is_symlink():
+                            to_delete.append(dst)
+                        continue
+                    if stat.S_ISDIR(src_st.st_mode):
+                        # 目录本身不复制，内容会有各自的事件
+                        continue
+                    try:
+                        dst_st = fast_stat(dst)
+                    except (FileNotFoundError, NotADirectoryError):
+                        dst_st = None
+                    if (dst_st is None
+                            or src_st.st_size != dst_st.st_size
+                            or src_st.st_mtime_ns != dst_st.st_mtime_ns):
+                        to_copy.append((Path(p), dst, src_st))
+        to_delete.sort(key=lambda p: len(p.parts), reverse=True)
+        self._apply(to_copy, to_delete)
 
     def sync(self):
         # 批量变动汇总
         with self._paths_lock:
-            changed = list(self._pending_paths)
-            self._pending_paths.clear()
-        if changed:
-            txt = "; ".join(str(p) for p in changed)
-            self.logger.info(f"✨ 检测到变动 {len(changed)} 条: {txt}")
+            events = self._pending_events
+            self._pending_events = []
+        if events and self.logger.isEnabledFor(logging.INFO):
+            txt = "; ".join(f"{t}:{p}" for t, p, _ in events[:20])
+            self.logger.info("✨ 检测到变动 %d 条: %s", len(events), txt)
 
-        if not self._lock.acquire(False):
+        if self._running.is_set():
             self._pending = True
+            with self._paths_lock:
+                self._pending_events = events + self._pending_events
             return
+        self._running.set()
 
         with self._counter_lock:
             self._copy_count   = 0
@@ -209,76 +758,154 @@ class SyncTask:
 
         start = time.time()
         self.logger.info("🕒 开始同步")
-        sem = threading.Semaphore(self.workers * 2)
         try:
-            with ThreadPoolExecutor(max_workers=self.workers) as pool:
-                for s_base, t_base in self._pairs():
-                    for src in s_base.rglob("*"):
-                        try:
-                            if (src.is_file()
-                                and not self.should_exclude(src, s_base)):
-                                dst = t_base / src.relative_to(s_base)
-                                need = False
-                                if not dst.exists():
-                                    need = True
-                                else:
-                                    if src.stat().st_mtime > dst.stat().st_mtime:
-                                        if compute_hash(src) != compute_hash(dst):
-                                            need = True
-                                if need:
-                                    sem.acquire()
-                                    pool.submit(
-                                        self._wrapped_copy, src, dst, sem
-                                    )
-                        except: continue
-                    for dst in t_base.rglob("*"):
-                        try:
-                            rel = dst.relative_to(t_base).as_posix()
-                            if any(fnmatch.fnmatch(rel, pat)
-                                   for pat in self.exclude):
-                                continue
-                            src = s_base / rel
-                            if not src.exists():
-                                sem.acquire()
-                                pool.submit(
-                                    self._wrapped_delete, dst, sem
-                                )
-                        except: continue
-                pool.shutdown(wait=True)
+            # 有事件且离上次全量不久：只核对变动路径；否则整树对账
+            if events and time.time() - self._last_full_sync < FULL_SCAN_INTERVAL:
+                self._sync_events(events)
+            else:
+                self.full_sync()
 
             elapsed = time.time() - start
             self.logger.info(
                 f"✅ 同步完成：复制 {self._copy_count} 个，"
                 f"删除 {self._delete_count} 个，耗时 {elapsed:.2f}s"
             )
+            self._save_hash_cache()
+            self._save_snapshot()
         except Exception as e:
             self.logger.error(f"同步出错：{e}", exc_info=True)
         finally:
-            self._lock.release()
+            self._running.clear()
             if self._pending:
                 self._pending = False
                 self.sync()
 
+    def _queue_event(self, evtype, src_path, dest_path=None):
+        """事件入队并推后去抖 deadline，watchdog 和 inotify 后端共用。"""
+        with self._paths_lock:
+            self._pending_events.append((evtype, src_path, dest_path))
+        # 纯尾沿去抖：回调里只推后 deadline（GIL 下单条赋值即原子），
+        # 事件风暴下也只会在安静 DEBOUNCE 秒后跑一次
+        self._deadline = time.monotonic() + DEBOUNCE
+        self._wake.set()
+
+    def _debounce_loop(self):
+        """常驻去抖线程：挂在 Event 上等事件，安静满 DEBOUNCE 秒才同步。"""
+        wake = self._wake
+        stopped = self._stopped
+        while not stopped.is_set():
+            wake.wait()
+            if stopped.is_set():
+                break
+            while True:
+                remaining = self._deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining)
+            wake.clear()
+            self.sync()
+
     class Handler(FileSystemEventHandler):
         def __init__(self, task):
             self.task = task
 
         def on_any_event(self, event):
-            with self.task._paths_lock:
-                self.task._pending_paths.add(Path(event.src_path))
-            self.task.sync()
-            if self.task._timer and self.task._timer.is_alive():
-                self.task._timer.cancel()
-            self.task._timer = threading.Timer(
-                DEBOUNCE, self.task.sync)
-            self.task._timer.start()
+            self.task._queue_event(
+                event.event_type,
+                event.src_path,
+                getattr(event, "dest_path", None) or None,
+            )
+
+    def stop(self):
+        # 先终止去抖线程，重载后旧任务不会再被事件唤醒
+        self._stopped.set()
+        self._wake.set()
+        self._debounce_thread.join(timeout=DEBOUNCE + 1)
+        # 线程池是全局共享的，这里不关；进程退出时统一 shutdown
+        # 停掉本任务的日志 listener，冲刷队列里还没落盘的记录；
+        # 把 handler 一并摘掉，配置重载后 setup_logger 会重新接线
+        listener = getattr(self.logger, "_cat_listener", None)
+        if listener is not None:
+            try:
+                listener.stop()
+            except Exception:
+                pass
+            if listener in _log_listeners:
+                _log_listeners.remove(listener)
+            self.logger._cat_listener = None
+            for h in list(self.logger.handlers):
+                self.logger.removeHandler(h)
 
     def _heartbeat_loop(self):
-        while True:
-            time.sleep(HEARTBEAT_INTERVAL)
+        while not self._stopped.wait(timeout=HEARTBEAT_INTERVAL):
             self.logger.info(f"🔄 心跳：任务「{self.name}」正常运行")
+            # 事件驱动之外的定时整树对账：inotify 队列溢出、整目录
+            # 移入等丢掉的变动，即使树随后安静下来也会在这里被治愈
+            if time.time() - self._last_full_sync >= FULL_SCAN_INTERVAL:
+                self.sync()
+
+    @staticmethod
+    def _top_level_state(src) -> dict:
+        """根目录 + 全部顶层条目的 {名字: mtime_ns} 快照。
+
+        只看根目录 mtime 会漏掉顶层以下的变动（目录 mtime 只随
+        直接子项变化），把顶层条目也纳入后，二级深度内的改动
+        都能被一次浅扫描察觉。
+        """
+        state = {"": os.stat(src).st_mtime_ns}
+        for e in os.scandir(src):
+            try:
+                state[e.name] = e.stat(follow_symlinks=False).st_mtime_ns
+            except OSError:
+                pass
+        return state
+
+    def _save_snapshot(self):
+        """记录各源的顶层 mtime 状态，下次启动用来判断休眠。"""
+        try:
+            snap = {os.fspath(s): self._top_level_state(s)
+                    for s in self.sources}
+            self._snapshot_path.write_text(json.dumps(snap), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _source_dormant(self, src: Path) -> bool:
+        """顶层状态和上次运行的快照完全一致 → 视为休眠中。"""
+        try:
+            snap = json.loads(self._snapshot_path.read_text(encoding="utf-8"))
+            return snap.get(os.fspath(src)) == self._top_level_state(src)
+        except (OSError, ValueError):
+            return False
+
+    def _watch_source(self, s: Path) -> list:
+        """给单个源挂实时监听，返回 observer 列表。"""
+        # Linux 上优先直接读 inotify：少一层 watchdog 的翻译队列，
+        # 还能靠 move cookie 把改名配成一对走零拷贝重命名
+        if (INotify is not None and sys.platform == "linux"
+                and not self.force_polling):
+            try:
+                watch = _InotifyWatch(self, s)
+            except OSError as e:
+                self.logger.warning(f"inotify 初始化失败，退回 watchdog：{e}")
+            else:
+                watch.start()
+                self.logger.info(f"👀 监听(inotify): {s}")
+                return [watch]
+        # Observer 自动选内核级后端（Linux inotify / macOS FSEvents），
+        # 不再整树轮询；轮询仅留给 force_polling 的网络挂载
+        if self.force_polling:
+            obs = PollingObserver(timeout=self.poll_interval)
+        else:
+            obs = Observer()
+        obs.schedule(self.Handler(self), str(s), recursive=True)
+        obs.start()
+        self.logger.info(f"👀 监听: {s}")
+        return [obs]
 
     def start(self):
+        # 休眠判定要在首次同步之前做——同步完快照必然等于当前状态
+        dormant = {os.fspath(s): self._source_dormant(s)
+                   for s in self.sources}
         self.cleanup_tmp_files()
         self.sync()
         threading.Thread(
@@ -286,19 +913,175 @@ class SyncTask:
         ).start()
         obs_list = []
         for s in self.sources:
-            ObsCls = PollingObserver if (
-                platform.system() == "Darwin"
-            ) else Observer
-            obs = ObsCls()
-            obs.schedule(self.Handler(self), str(s), recursive=True)
-            obs.start()
-            self.logger.info(f"👀 监听: {s}")
-            obs_list.append(obs)
+            if dormant[os.fspath(s)]:
+                # 上次运行以来顶层状态没动过：先挂个只做浅扫描的
+                # 低频看门人，省下整树递归 watch 的 fd 和内存，
+                # 等首次探测到活动再升级成实时监听
+                watch = _DormantWatch(self, s)
+                watch.start()
+                self.logger.info(f"💤 源近期无活动，低频看护: {s}")
+                obs_list.append(watch)
+                continue
+            obs_list.extend(self._watch_source(s))
         return obs_list
 
+class _DormantWatch:
+    """休眠源的看门人：每轮只 stat 根目录，首次探测到活动才升级。
+
+    配了很多任务而大部分长期没动静时，递归 watch 的 fd 和内存
+    只花在真正活跃的树上；接口对齐 Observer（start/stop/join）。
+    每轮比较的是顶层 mtime 状态（见 _top_level_state），更深的
+    变动由定时整树对账兜底——对账真发现了差异也会立即升级。
+    """
+
+    def __init__(self, task: SyncTask, root: Path):
+        self.task = task
+        self.root = root
+        self._stop_evt = threading.Event()
+        self._promoted: list = []
+        self._thread = threading.Thread(
+            target=self._loop, daemon=True,
+            name=f"{task.name}-dormant")
+
+    def _loop(self):
+        task = self.task
+        try:
+            last = task._top_level_state(self.root)
+        except OSError:
+            last = None
+        while not self._stop_evt.wait(timeout=DORMANT_POLL):
+            if time.time() - task._last_full_sync > FULL_SCAN_INTERVAL:
+                task.sync()
+                with task._counter_lock:
+                    changed = task._copy_count or task._delete_count
+                if changed:
+                    # 浅扫描没看到、对账却搬了文件：树其实是活的
+                    break
+            try:
+                cur = task._top_level_state(self.root)
+            except OSError:
+                cur = None
+            if cur != last:
+                break
+        if self._stop_evt.is_set():
+            return
+        task.logger.info(f"⏫ 检测到活动，升级为实时监听: {self.root}")
+        # 先挂上实时监听再整树对账，中间的变动不会漏
+        self._promoted = task._watch_source(self.root)
+        task.sync()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        for o in self._promoted:
+            o.stop()
+
+    def join(self):
+        self._thread.join(timeout=2)
+        for o in self._promoted:
+            o.join()
+
+class _InotifyWatch:
+    """单个源目录的递归 inotify 监听，接口对齐 watchdog Observer。
+
+    自己维护 wd→目录 映射递归挂 watch；IN_MOVED_FROM/TO 按 cookie
+    配成 "moved" 事件，交给 _mirror_move 在目标端直接改名。
+    """
+
+    def __init__(self, task: SyncTask, root: Path):
+        self.task = task
+        self.ino = INotify()
+        self._wd_to_path: dict[int, str] = {}
+        self._stop_evt = threading.Event()
+        self._mask = (in_flags.CREATE | in_flags.MODIFY | in_flags.DELETE
+                      | in_flags.MOVED_FROM | in_flags.MOVED_TO
+                      | in_flags.CLOSE_WRITE | in_flags.DELETE_SELF)
+        self._add_recursive(os.fspath(root))
+        self._thread = threading.Thread(
+            target=self._loop, daemon=True,
+            name=f"{task.name}-inotify")
+
+    def _add_recursive(self, path: str):
+        try:
+            wd = self.ino.add_watch(path, self._mask)
+        except OSError:
+            # 目录刚被删/权限不足，跳过即可，整树对账会兜底
+            return
+        self._wd_to_path[wd] = path
+        try:
+            for e in os.scandir(path):
+                if e.is_dir(follow_symlinks=False):
+                    self._add_recursive(e.path)
+        except OSError:
+            pass
+
+    def _loop(self):
+        task = self.task
+        pending_from: dict[int, str] = {}
+        while not self._stop_evt.is_set():
+            try:
+                events = self.ino.read(timeout=500)
+            except (OSError, ValueError):
+                break
+            for ev in events:
+                if ev.mask & in_flags.Q_OVERFLOW:
+                    # 内核事件队列溢出，中间丢了什么无从得知：
+                    # 清掉全量时间戳，让接下来的去抖同步走整树对账
+                    task._last_full_sync = 0.0
+                    task._queue_event("overflow", None)
+                    continue
+                base = self._wd_to_path.get(ev.wd)
+                if base is None:
+                    continue
+                if ev.mask & in_flags.DELETE_SELF:
+                    self._wd_to_path.pop(ev.wd, None)
+                    continue
+                path = os.path.join(base, ev.name) if ev.name else base
+                if ev.mask & in_flags.ISDIR and ev.mask & (
+                        in_flags.CREATE | in_flags.MOVED_TO):
+                    # 新出现的子目录补挂监听，不然其内部变动收不到
+                    self._add_recursive(path)
+                if ev.mask & in_flags.MOVED_FROM:
+                    pending_from[ev.cookie] = path
+                    continue
+                if ev.mask & in_flags.MOVED_TO:
+                    old = pending_from.pop(ev.cookie, None)
+                    if old is not None:
+                        task._queue_event("moved", old, path)
+                    else:
+                        # 从监听范围外移入，当作新建
+                        task._queue_event("created", path)
+                    continue
+                if ev.mask & in_flags.DELETE:
+                    task._queue_event("deleted", path)
+                elif ev.mask & (in_flags.CREATE | in_flags.CLOSE_WRITE
+                                | in_flags.MODIFY):
+                    task._queue_event("modified", path)
+            # 一轮读完还没配上对的 MOVED_FROM：移出了监听范围，按删除处理
+            if pending_from:
+                for old in pending_from.values():
+                    task._queue_event("deleted", old)
+                pending_from.clear()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+
+    def join(self):
+        self._thread.join(timeout=2)
+        try:
+            self.ino.close()
+        except OSError:
+            pass
+
 # —— 动态重载配置 ——
 tasks: list[SyncTask] = []
 observers: list = []
+_shutdown_event = threading.Event()
 
 class ConfigReloader(FileSystemEventHandler):
     def __init__(self):
@@ -319,6 +1102,8 @@ def reload_config():
     for o in observers:
         o.join()
     observers.clear()
+    for t in tasks:
+        t.stop()
     tasks.clear()
     try:
         cfg = json.loads(CFG_PATH.read_text(encoding="utf-8"))
@@ -334,6 +1119,8 @@ def reload_config():
         logging.error(f"加载 config.json 失败：{e}")
 
 def sync_worker():
+    global _worker_process
+    _worker_process = True
     logger = logging.getLogger("sync_worker")
     try:
         cfg_obs = PollingObserver()
@@ -342,8 +1129,8 @@ def sync_worker():
         cfg_obs.start()
         observers.append(cfg_obs)
         reload_config()
-        while True:
-            time.sleep(0.5)
+        # 挂在 Event 上等待退出信号，不再 0.5s 轮询空转
+        _shutdown_event.wait()
     except KeyboardInterrupt:
         logger.info("子进程收到退出信号，优雅退出")
     finally:
@@ -351,6 +1138,10 @@ def sync_worker():
             o.stop()
         for o in observers:
             o.join()
+        for t in tasks:
+            t.stop()
+        shutdown_global_pool()
+        stop_log_listeners()
 
 def supervise():
     root_logger = logging.getLogger()